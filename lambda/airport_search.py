@@ -2,25 +2,117 @@
 Lambda function to search airports from aviationweather.gov stations API
 
 This function fetches all US airports and filters by search query.
-Results are cached in Lambda memory for performance.
+Results are cached in Lambda memory for performance. A scheduled
+{"refresh": true} invocation picks up changes to the dataset with a
+conditional request, so searches never wait on the upstream download.
 """
 
 import urllib.request
 import urllib.error
+import bisect
+import csv
 import json
 import logging
+from io import StringIO
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# OurAirports provides free, open airport data
+AIRPORTS_URL = 'https://raw.githubusercontent.com/davidmegginson/ourairports-data/main/airports.csv'
+
+# Socket timeout for downloads. Kept well under the function timeout so a
+# slow upstream fails the refresh rather than the invocation
+DOWNLOAD_TIMEOUT_SECONDS = 5
+
 # Cache for airport data (persists across Lambda invocations in same container)
 _airport_cache = None
 
+# Cached airports keyed on OurAirports ident, used to diff refreshed data
+_airport_index = {}
+
+# ETag/Last-Modified from the last download, for conditional requests
+_airport_validators = {}
+
+
+def _icao_key(airport):
+    return airport['icao']
+
+
+def download_airports(validators=None):
+    """
+    Download the OurAirports CSV, conditionally if validators are given.
+    Returns (data, validators); data is None when the file is unchanged.
+    """
+    validators = validators or {}
+    
+    req = urllib.request.Request(AIRPORTS_URL)
+    req.add_header('User-Agent', 'Website-Airport-Search/1.0')
+    if validators.get('etag'):
+        req.add_header('If-None-Match', validators['etag'])
+    if validators.get('last_modified'):
+        req.add_header('If-Modified-Since', validators['last_modified'])
+    
+    try:
+        with urllib.request.urlopen(req, timeout=DOWNLOAD_TIMEOUT_SECONDS) as response:
+            data = response.read().decode('utf-8')
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, validators
+        raise
+    
+    return data, {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified')
+    }
+
+
+def parse_airports(data):
+    """Parse the OurAirports CSV into US airports keyed on ident"""
+    reader = csv.DictReader(StringIO(data))
+    airports = {}
+    
+    for row in reader:
+        # Only include US airports with valid ICAO codes
+        if row.get('iso_country') != 'US':
+            continue
+        
+        # Use ident as primary identifier, prefer icao_code if available
+        icao = row.get('icao_code') or row.get('ident', '')
+        if not icao or len(icao) < 3:
+            continue
+        
+        # Only include airports (not heliports, seaplanes bases, etc.) for cleaner results
+        airport_type = row.get('type', '')
+        if airport_type not in ('large_airport', 'medium_airport', 'small_airport'):
+            continue
+        
+        try:
+            lat = float(row.get('latitude_deg', 0))
+            lon = float(row.get('longitude_deg', 0))
+        except (ValueError, TypeError):
+            continue
+        
+        # Extract state from iso_region (format: US-XX)
+        iso_region = row.get('iso_region', '')
+        state = iso_region.split('-')[1] if '-' in iso_region else ''
+        
+        airports[row.get('ident') or icao] = {
+            'icao': icao.upper(),
+            'name': row.get('name', 'Unknown'),
+            'state': state,
+            'lat': lat,
+            'lon': lon
+        }
+    
+    return airports
+
 
 def fetch_all_airports():
     """Fetch all US airports from OurAirports open data"""
-    global _airport_cache
+    global _airport_cache, _airport_index, _airport_validators
     
     if _airport_cache is not None:
         logger.info("Using cached airport data")
@@ -28,60 +120,16 @@ def fetch_all_airports():
     
     logger.info("Fetching airports from OurAirports")
     
-    # OurAirports provides free, open airport data
-    url = 'https://raw.githubusercontent.com/davidmegginson/ourairports-data/main/airports.csv'
-    
     try:
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Website-Airport-Search/1.0')
-        
-        with urllib.request.urlopen(req, timeout=30) as response:
-            data = response.read().decode('utf-8')
-        
-        # Parse CSV data
-        import csv
-        from io import StringIO
-        
-        reader = csv.DictReader(StringIO(data))
-        airports = []
-        
-        for row in reader:
-            # Only include US airports with valid ICAO codes
-            if row.get('iso_country') != 'US':
-                continue
-            
-            # Use ident as primary identifier, prefer icao_code if available
-            icao = row.get('icao_code') or row.get('ident', '')
-            if not icao or len(icao) < 3:
-                continue
-            
-            # Only include airports (not heliports, seaplanes bases, etc.) for cleaner results
-            airport_type = row.get('type', '')
-            if airport_type not in ('large_airport', 'medium_airport', 'small_airport'):
-                continue
-            
-            try:
-                lat = float(row.get('latitude_deg', 0))
-                lon = float(row.get('longitude_deg', 0))
-            except (ValueError, TypeError):
-                continue
-            
-            # Extract state from iso_region (format: US-XX)
-            iso_region = row.get('iso_region', '')
-            state = iso_region.split('-')[1] if '-' in iso_region else ''
-            
-            airports.append({
-                'icao': icao.upper(),
-                'name': row.get('name', 'Unknown'),
-                'state': state,
-                'lat': lat,
-                'lon': lon
-            })
+        data, validators = download_airports()
+        index = parse_airports(data)
         
         # Sort by ICAO code for consistent results
-        airports.sort(key=lambda x: x['icao'])
+        airports = sorted(index.values(), key=_icao_key)
         
         logger.info(f"Loaded {len(airports)} US airports")
+        _airport_index = index
+        _airport_validators = validators
         _airport_cache = airports
         return airports
         
@@ -90,6 +138,82 @@ def fetch_all_airports():
         return []
 
 
+def _remove_airport(airports, airport):
+    """Remove a specific airport entry from the ICAO-sorted list"""
+    i = bisect.bisect_left(airports, airport['icao'], key=_icao_key)
+    while i < len(airports) and airports[i]['icao'] == airport['icao']:
+        if airports[i] is airport:
+            del airports[i]
+            return
+        i += 1
+
+
+def apply_airport_diff(new_index):
+    """
+    Merge freshly parsed airports into the cache, touching only rows whose
+    ident was added, removed or changed.
+
+    Changes are applied to a copy of the sorted list which then replaces the
+    cache in one assignment; unchanged entries are reused as-is.
+    Returns (added, removed, changed) counts.
+    """
+    global _airport_cache, _airport_index
+    
+    airports = list(_airport_cache)
+    index = {}
+    added = removed = changed = 0
+    
+    for ident, airport in _airport_index.items():
+        if ident not in new_index:
+            _remove_airport(airports, airport)
+            removed += 1
+    
+    for ident, airport in new_index.items():
+        old = _airport_index.get(ident)
+        if old == airport:
+            index[ident] = old
+            continue
+        
+        if old is None:
+            added += 1
+        else:
+            _remove_airport(airports, old)
+            changed += 1
+        
+        bisect.insort(airports, airport, key=_icao_key)
+        index[ident] = airport
+    
+    _airport_index = index
+    _airport_cache = airports
+    return added, removed, changed
+
+
+def refresh_airports():
+    """
+    Check OurAirports for changes and apply them to the cache.
+    A container without a cache just loads it, which is already current.
+    """
+    global _airport_validators
+    
+    if _airport_cache is None:
+        fetch_all_airports()
+        return
+    
+    try:
+        data, validators = download_airports(_airport_validators)
+        
+        if data is None:
+            logger.info("Airport data unchanged since last download")
+            return
+        
+        added, removed, changed = apply_airport_diff(parse_airports(data))
+        _airport_validators = validators
+        logger.info(f"Refreshed airports: {added} added, {removed} removed, {changed} changed")
+        
+    except Exception as e:
+        logger.error(f"Failed to refresh airports: {str(e)}")
+
+
 def search_airports(query, limit=15):
     """Search airports by ICAO code or name"""
     airports = fetch_all_airports()
@@ -127,6 +251,9 @@ def handler(event, context):
     """
     Lambda handler for airport search
     
+    Scheduled events with {"refresh": true} refresh the cached airport data
+    instead of searching.
+    
     Query Parameters:
         q (str): Search query (ICAO prefix or name substring)
         limit (int): Maximum results to return (default 15)
@@ -135,6 +262,10 @@ def handler(event, context):
         dict: API Gateway response with matching airports
     """
     
+    if event.get('refresh'):
+        refresh_airports()
+        return {'refreshed': True}
+    
     # Get query parameters
     query_params = event.get('queryStringParameters') or {}
     query = query_params.get('q', '')
@@ -0,0 +1,35 @@
+"""
+Time helpers shared by the weather Lambda functions
+
+Aviation reports carry only day-of-month and time (DDHHMMZ), and the API
+endpoints take ISO 8601 timestamps; these helpers turn both into UTC datetimes.
+"""
+
+from datetime import datetime, timezone
+
+
+def parse_time(value):
+    """Parse an ISO 8601 timestamp, treating naive times as UTC"""
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def resolve_day_time(day, hour, minute, now):
+    """
+    Resolve a DDHHMM report time to a datetime near now.
+    Reports only carry the day of month, so pick the closest month.
+    """
+    candidates = []
+    for month_offset in (-1, 0, 1):
+        year = now.year + (now.month - 1 + month_offset) // 12
+        month = (now.month - 1 + month_offset) % 12 + 1
+        try:
+            candidates.append(datetime(year, month, day, hour, minute, tzinfo=timezone.utc))
+        except ValueError:
+            continue
+
+    if not candidates:
+        return now
+    return min(candidates, key=lambda candidate: abs(candidate - now))
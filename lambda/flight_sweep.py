@@ -0,0 +1,612 @@
+"""
+Lambda function to sweep departure times for a flight plan
+
+This function runs the flight planner's altitude optimization over a window of
+departure times in a single request. Winds aloft for the 6/12/24 hour periods,
+airport data and the departure METAR are fetched once, and every departure time
+in the window reuses the same per-forecast groundspeed table.
+
+The calculations mirror src/lib/flightPlanner.js so results match the planner.
+"""
+
+import urllib.request
+import urllib.error
+import json
+import logging
+import math
+import re
+from datetime import datetime, timedelta, timezone
+
+try:
+    from . import winds_aloft
+    from .aviation_time import parse_time, resolve_day_time
+except ImportError:
+    import winds_aloft
+    from aviation_time import parse_time, resolve_day_time
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Constants
+EARTH_RADIUS_NM = 3440.065  # Earth radius in nautical miles
+FEET_TO_METERS = 0.3048
+STANDARD_TEMP_KELVIN = 288.15  # ISA sea level temperature in Kelvin
+TEMP_LAPSE_RATE = 0.0065  # K/m
+
+FORECAST_PERIODS = ['6', '12', '24']
+
+# Limits to keep a single sweep bounded
+MAX_WINDOW_HOURS = 48
+MAX_DEPARTURE_TIMES = 288
+MIN_ALTITUDE = 0
+MAX_ALTITUDE = 18000
+
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    """Great circle distance between two points in nautical miles"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(d_phi / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_NM * c
+
+
+def calculate_bearing(lat1, lon1, lat2, lon2):
+    """Initial bearing (true course) from point 1 to point 2 in degrees"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_lambda = math.radians(lon2 - lon1)
+
+    y = math.sin(d_lambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - \
+        math.sin(phi1) * math.cos(phi2) * math.cos(d_lambda)
+
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+
+def intermediate_point(lat1, lon1, lat2, lon2, fraction):
+    """Point at a fraction of the way along the great circle route"""
+    phi1, lambda1 = math.radians(lat1), math.radians(lon1)
+    phi2, lambda2 = math.radians(lat2), math.radians(lon2)
+
+    a = math.sin((phi2 - phi1) / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin((lambda2 - lambda1) / 2) ** 2
+    delta = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    if delta == 0:
+        return lat1, lon1
+
+    A = math.sin((1 - fraction) * delta) / math.sin(delta)
+    B = math.sin(fraction * delta) / math.sin(delta)
+
+    x = A * math.cos(phi1) * math.cos(lambda1) + B * math.cos(phi2) * math.cos(lambda2)
+    y = A * math.cos(phi1) * math.sin(lambda1) + B * math.cos(phi2) * math.sin(lambda2)
+    z = A * math.sin(phi1) + B * math.sin(phi2)
+
+    return (math.degrees(math.atan2(z, math.sqrt(x * x + y * y))),
+            math.degrees(math.atan2(y, x)))
+
+
+def segment_route(lat1, lon1, lat2, lon2, segment_distance_nm):
+    """
+    Split a route into equal-distance waypoints.
+    Returns the start point of each segment (the destination is excluded).
+    """
+    total_distance = calculate_distance(lat1, lon1, lat2, lon2)
+    num_segments = max(1, math.ceil(total_distance / segment_distance_nm))
+
+    return [intermediate_point(lat1, lon1, lat2, lon2, i / num_segments)
+            for i in range(num_segments)]
+
+
+def determine_region(lat, lon):
+    """Winds aloft region code for a latitude/longitude in CONUS"""
+    if lat > 38:
+        if lon > -85:
+            return 'bos'  # Northeast
+        elif lon > -105:
+            return 'chi'  # Northcentral
+        return 'slc'  # Rocky Mountains
+    if lon > -90:
+        return 'mia'  # Southeast
+    elif lon > -105:
+        return 'dfw'  # Southcentral
+    return 'sfo'  # Pacific Coast
+
+
+def validity_window(valid_time, use_from, use_to):
+    """
+    Absolute validity window for a forecast.
+    FOR USE times are HHMM around the valid time, so the window starts at the
+    last use_from at or before it and ends at the first use_to at or after it.
+    """
+    midnight = valid_time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    start = midnight + timedelta(hours=use_from // 100, minutes=use_from % 100)
+    if start > valid_time:
+        start -= timedelta(days=1)
+
+    end = midnight + timedelta(hours=use_to // 100, minutes=use_to % 100)
+    if end < valid_time:
+        end += timedelta(days=1)
+
+    return start, end
+
+
+def parse_winds_aloft(raw_data, now=None):
+    """
+    Parse raw winds aloft forecast text.
+    Returns the absolute validity window and per-station winds keyed by altitude.
+    """
+    now = now or datetime.now(timezone.utc)
+    lines = raw_data.split('\n')
+
+    valid_from = None
+    valid_to = None
+    temps_negative_above = 24000
+    altitudes = []
+
+    for line in lines:
+        if 'VALID' in line and valid_from is None:
+            match = re.search(r'VALID\s+(\d{2})(\d{2})(\d{2})Z\s+FOR USE\s+(\d{4})-(\d{4})Z', line)
+            if match:
+                valid_time = resolve_day_time(
+                    int(match.group(1)), int(match.group(2)), int(match.group(3)), now
+                )
+                valid_from, valid_to = validity_window(
+                    valid_time, int(match.group(4)), int(match.group(5))
+                )
+        elif 'TEMPS NEG ABV' in line:
+            match = re.search(r'TEMPS NEG ABV\s+(\d+)', line)
+            if match:
+                temps_negative_above = int(match.group(1))
+        elif line.strip().startswith('FT') and not altitudes:
+            altitudes = [int(alt) for alt in re.findall(r'\d+', line)]
+
+    airports = {}
+    for line in lines:
+        line = line.strip()
+        # Skip header lines and empty lines
+        if not line or line.startswith('(') or line.startswith('FD') or \
+           line.startswith('DATA') or line.startswith('VALID') or \
+           line.startswith('FT') or 'TEMPS NEG' in line:
+            continue
+
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+
+        station_winds = {}
+        for alt, data in zip(altitudes, parts[1:]):
+            if data == '9900':
+                continue
+
+            if len(data) == 4:
+                # Format: DDSS (e.g., 3315 = 330 degrees at 15kt)
+                station_winds[alt] = (int(data[0:2]) * 10, int(data[2:4]), None)
+            elif len(data) >= 6:
+                # Format: DDSSTT or DDSSMTT (e.g., 2613-17 = 260 degrees at 13kt, -17C)
+                match = re.match(r'(\d{2})(\d{2})([+-]?\d{2})', data)
+                if match:
+                    temp = int(match.group(3))
+                    # Apply negative temperature rule if above threshold
+                    if alt >= temps_negative_above and temp > 0:
+                        temp = -temp
+                    station_winds[alt] = (int(match.group(1)) * 10, int(match.group(2)), temp)
+
+        if station_winds:
+            airports[parts[0]] = station_winds
+
+    return {
+        'validFrom': valid_from,
+        'validTo': valid_to,
+        'airports': airports
+    }
+
+
+def interpolate_wind(station_winds, altitude):
+    """Linearly interpolate (direction, speed, temp) for an altitude"""
+    altitudes = sorted(station_winds)
+
+    if not altitudes:
+        return 0, 0, 15
+
+    if altitude <= altitudes[0]:
+        return station_winds[altitudes[0]]
+    if altitude >= altitudes[-1]:
+        return station_winds[altitudes[-1]]
+
+    for lower_alt, upper_alt in zip(altitudes, altitudes[1:]):
+        if lower_alt <= altitude <= upper_alt:
+            break
+
+    dir1, speed1, temp1 = station_winds[lower_alt]
+    dir2, speed2, temp2 = station_winds[upper_alt]
+    fraction = (altitude - lower_alt) / (upper_alt - lower_alt)
+
+    # For wind direction, need to handle wraparound
+    if abs(dir2 - dir1) > 180:
+        if dir2 > dir1:
+            dir1 += 360
+        else:
+            dir2 += 360
+
+    direction = (dir1 + (dir2 - dir1) * fraction + 360) % 360
+    speed = speed1 + (speed2 - speed1) * fraction
+
+    temp = None
+    if temp1 is not None and temp2 is not None:
+        temp = temp1 + (temp2 - temp1) * fraction
+
+    return direction, speed, temp
+
+
+def ias_to_tas(ias, altitude_feet, temp_c, altimeter_inhg=29.92):
+    """Convert indicated to true airspeed using the ISA model"""
+    pressure_altitude = altitude_feet + (29.92 - altimeter_inhg) * 1000
+    altitude_meters = pressure_altitude * FEET_TO_METERS
+
+    isa_temp = STANDARD_TEMP_KELVIN - TEMP_LAPSE_RATE * altitude_meters
+    density_ratio = (1 - TEMP_LAPSE_RATE * altitude_meters / STANDARD_TEMP_KELVIN) ** 4.256
+    temp_ratio = (temp_c + 273.15) / isa_temp
+
+    return ias * math.sqrt(1 / density_ratio) * math.sqrt(temp_ratio)
+
+
+def calculate_groundspeed(tas, true_course, wind_direction, wind_speed):
+    """Solve the wind triangle for groundspeed"""
+    course_rad = math.radians(true_course)
+
+    # Wind vector components (from direction, so add 180 degrees)
+    wind_from_rad = math.radians(wind_direction) + math.pi
+    gs_north = tas * math.cos(course_rad) + wind_speed * math.cos(wind_from_rad)
+    gs_east = tas * math.sin(course_rad) + wind_speed * math.sin(wind_from_rad)
+
+    return math.sqrt(gs_north * gs_north + gs_east * gs_east)
+
+
+def find_nearest_station(lat, lon, station_codes, station_coords):
+    """Nearest winds aloft station using an equirectangular approximation"""
+    nearest_station = station_codes[0]
+    nearest_dist_sq = float('inf')
+
+    for code in station_codes:
+        coords = station_coords.get(code)
+        if not coords or coords.get('lat') is None or coords.get('lon') is None:
+            continue
+        d_lat = coords['lat'] - lat
+        d_lon = (coords['lon'] - lon) * math.cos((lat + coords['lat']) * math.pi / 360)
+        dist_sq = d_lat * d_lat + d_lon * d_lon
+        if dist_sq < nearest_dist_sq:
+            nearest_dist_sq = dist_sq
+            nearest_station = code
+
+    return nearest_station
+
+
+def select_forecast(forecasts, departure_time):
+    """
+    Index of the forecast whose validity window covers the departure time.
+
+    Unlike the planner, which only compares time of day for a near-term
+    departure, windows are absolute so a sweep spanning days or the past
+    cannot match the wrong period. Times outside every window fall back to
+    the nearest window and are flagged as outside validity.
+    """
+    windows = [
+        (idx, forecast['validFrom'], forecast['validTo'])
+        for idx, forecast in enumerate(forecasts)
+        if forecast['validFrom'] is not None
+    ]
+
+    for idx, valid_from, valid_to in windows:
+        if valid_from <= departure_time <= valid_to:
+            return idx, True
+
+    if not windows:
+        return len(forecasts) - 1, False
+
+    nearest = min(
+        windows,
+        key=lambda window: max(window[1] - departure_time, departure_time - window[2])
+    )
+    return nearest[0], False
+
+
+def groundspeed_table(forecast, segments, altitudes, true_course, ias, metar, surface_elevation):
+    """
+    Average groundspeed at each altitude for one forecast period.
+
+    Segments that share a nearest station share a wind, so the wind triangle
+    is solved once per (station, altitude) and weighted by segment count.
+    """
+    station_codes = sorted(forecast['airports'])
+    station_counts = {}
+    for lat, lon in segments:
+        code = find_nearest_station(lat, lon, station_codes, forecast['stationCoords'])
+        station_counts[code] = station_counts.get(code, 0) + 1
+
+    averages = []
+    for altitude in altitudes:
+        total_groundspeed = 0
+        for code, count in station_counts.items():
+            direction, speed, temp = interpolate_wind(forecast['airports'][code], altitude)
+
+            # If winds aloft doesn't have temperature, estimate using ISA lapse rate
+            # (2C per 1000 feet) from surface METAR temperature
+            if temp is None:
+                temp = metar['tempC'] - (altitude - surface_elevation) / 1000 * 2.0
+
+            tas = ias_to_tas(ias, altitude, temp, metar['altimeter'])
+            total_groundspeed += count * calculate_groundspeed(tas, true_course, direction, speed)
+
+        averages.append(total_groundspeed / len(segments))
+
+    return averages
+
+
+def find_best(departure_times, altitudes, rows, within_validity, distance):
+    """
+    Fastest (departure time, altitude) in the sweep.
+    Only departures within forecast validity are considered unless there are
+    none; ties keep the earliest departure and lowest altitude.
+    """
+    candidates = [i for i, valid in enumerate(within_validity) if valid]
+    if not candidates:
+        candidates = range(len(departure_times))
+
+    best = None
+    for i in candidates:
+        for altitude, gs in zip(altitudes, rows[i]):
+            if best is None or distance / gs < best['ete']:
+                best = {
+                    'time': departure_times[i].strftime('%Y-%m-%dT%H:%MZ'),
+                    'altitude': altitude,
+                    'groundspeed': round(gs, 1),
+                    'ete': distance / gs,
+                    'withinValidity': within_validity[i]
+                }
+
+    best['ete'] = round(best['ete'], 3)
+    return best
+
+
+def fetch_airports(icao_codes):
+    """Fetch lat/lon/elevation (feet) for airports from aviationweather.gov"""
+    url = f'https://aviationweather.gov/api/data/stationinfo?ids={",".join(icao_codes)}&format=json'
+
+    req = urllib.request.Request(url)
+    req.add_header('User-Agent', 'Website-Weather-Proxy/1.0')
+
+    with urllib.request.urlopen(req, timeout=10) as response:
+        data = response.read().decode('utf-8')
+
+    airports = {}
+    for station in (json.loads(data) if data.strip() else []):
+        elevation = station.get('elev')
+        airports[station.get('icaoId', '')] = {
+            'lat': station.get('lat'),
+            'lon': station.get('lon'),
+            'elevation': round(elevation * 3.28084) if elevation is not None else 0
+        }
+
+    return airports
+
+
+def fetch_metar(icao):
+    """Fetch and parse altimeter and temperature, falling back to standard atmosphere"""
+    metar = {'altimeter': 29.92, 'tempC': 15}
+    url = f'https://aviationweather.gov/api/data/metar?ids={icao}&format=raw'
+
+    try:
+        req = urllib.request.Request(url)
+        req.add_header('User-Agent', 'Website-Weather-Proxy/1.0')
+
+        with urllib.request.urlopen(req, timeout=10) as response:
+            raw = response.read().decode('utf-8')
+    except Exception as e:
+        logger.warning(f"Failed to fetch METAR for {icao}, using standard atmosphere: {e}")
+        return metar
+
+    altimeter_match = re.search(r'A(\d{4})', raw)
+    temp_match = re.search(r'\s(M?\d{2})/(M?\d{2})\s', raw)
+
+    if altimeter_match:
+        metar['altimeter'] = int(altimeter_match.group(1)) / 100
+    if temp_match:
+        temp = temp_match.group(1)
+        metar['tempC'] = -int(temp[1:]) if temp.startswith('M') else int(temp)
+
+    return metar
+
+
+def fetch_forecasts(region):
+    """Fetch and parse all forecast periods for a region, with station coordinates"""
+    forecasts = []
+
+    for fcst in FORECAST_PERIODS:
+        try:
+            raw = winds_aloft.fetch_winds_aloft(region, fcst)
+        except Exception as e:
+            logger.error(f"Failed to fetch {fcst}hr forecast: {e}")
+            continue
+
+        forecast = parse_winds_aloft(raw)
+        if not forecast['airports']:
+            continue
+
+        forecast['forecastHour'] = int(fcst)
+        forecast['stationCoords'] = winds_aloft.fetch_station_coordinates(list(forecast['airports']))
+        forecasts.append(forecast)
+
+    return forecasts
+
+
+def error_response(status_code, message):
+    """Build a JSON error response with CORS headers"""
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Content-Type': 'application/json'
+        },
+        'body': json.dumps({
+            'error': message
+        })
+    }
+
+
+def handler(event, context):
+    """
+    Lambda handler for departure time sweep
+
+    Query Parameters:
+        departure (str): Departure airport ICAO code (e.g., 'KBOS')
+        destination (str): Destination airport ICAO code (e.g., 'KJFK')
+        ias (float): Indicated airspeed in knots
+        from (str): Start of departure window, ISO 8601 UTC (e.g., '2024-01-01T12:00Z')
+        to (str): End of departure window, ISO 8601 UTC
+        step (int): Minutes between departure times (default 60)
+        minAlt (int): Minimum altitude in feet, 0-18000 (default 2000)
+        maxAlt (int): Maximum altitude in feet, 0-18000 (default 10000)
+        resolution (float): Route segment length in NM (default 50)
+
+    Returns:
+        dict: API Gateway response with a time x altitude matrix of
+              average groundspeed (kt) and estimated time enroute (hours)
+    """
+
+    # Get query parameters
+    query_params = event.get('queryStringParameters') or {}
+    departure = query_params.get('departure', '').upper().strip()
+    destination = query_params.get('destination', '').upper().strip()
+
+    for icao in (departure, destination):
+        if not icao or len(icao) < 3 or len(icao) > 4:
+            logger.warning(f"Invalid ICAO code: {icao}")
+            return error_response(400, 'Invalid ICAO code. Must be 3-4 characters (e.g., KBOS, KJFK)')
+
+    try:
+        ias = float(query_params.get('ias', ''))
+        start = parse_time(query_params.get('from', ''))
+        end = parse_time(query_params.get('to', ''))
+        step = int(query_params.get('step', '60'))
+        min_alt = int(query_params.get('minAlt', '2000'))
+        max_alt = int(query_params.get('maxAlt', '10000'))
+        resolution = float(query_params.get('resolution', '50'))
+    except ValueError:
+        return error_response(400, 'Invalid parameters. Requires ias, from and to; step, minAlt, maxAlt and resolution must be numeric')
+
+    if not math.isfinite(ias) or not math.isfinite(resolution):
+        return error_response(400, 'ias and resolution must be finite numbers')
+
+    if ias <= 0 or step <= 0 or resolution <= 0 or min_alt >= max_alt:
+        return error_response(400, 'ias, step and resolution must be positive and minAlt must be below maxAlt')
+
+    if min_alt < MIN_ALTITUDE or max_alt > MAX_ALTITUDE:
+        return error_response(400, f'minAlt and maxAlt must be between {MIN_ALTITUDE} and {MAX_ALTITUDE} feet')
+
+    if end < start or end - start > timedelta(hours=MAX_WINDOW_HOURS):
+        return error_response(400, f'Departure window must be between 0 and {MAX_WINDOW_HOURS} hours')
+
+    departure_times = []
+    current = start
+    while current <= end:
+        departure_times.append(current)
+        current += timedelta(minutes=step)
+
+    if len(departure_times) > MAX_DEPARTURE_TIMES:
+        return error_response(400, f'Too many departure times. Increase step to keep at most {MAX_DEPARTURE_TIMES}')
+
+    altitudes = list(range(math.ceil(min_alt / 1000) * 1000, max_alt + 1, 1000))
+    if not altitudes:
+        return error_response(400, 'No candidate altitudes between minAlt and maxAlt')
+
+    logger.info(f"Sweeping {departure}->{destination}: {len(departure_times)} departure times x {len(altitudes)} altitudes")
+
+    try:
+        airports = fetch_airports([departure, destination])
+        for icao in (departure, destination):
+            if icao not in airports or airports[icao]['lat'] is None:
+                logger.warning(f"Airport not found: {icao}")
+                return error_response(404, f'Airport {icao} not found in FAA database')
+
+        dep, dest = airports[departure], airports[destination]
+        distance = calculate_distance(dep['lat'], dep['lon'], dest['lat'], dest['lon'])
+        true_course = calculate_bearing(dep['lat'], dep['lon'], dest['lat'], dest['lon'])
+        segments = segment_route(dep['lat'], dep['lon'], dest['lat'], dest['lon'], resolution)
+
+        region = determine_region(dep['lat'], dep['lon'])
+        forecasts = fetch_forecasts(region)
+        if not forecasts:
+            return error_response(503, 'No forecast data available. Unable to calculate flight plan without winds aloft data.')
+
+        metar = fetch_metar(departure)
+
+        # Every departure time maps onto one of at most three forecast periods, so
+        # the altitude x segment work is done once per period actually used
+        tables = {}
+        rows = []
+        forecast_hours = []
+        within_validity = []
+
+        for departure_time in departure_times:
+            idx, valid = select_forecast(forecasts, departure_time)
+            if idx not in tables:
+                tables[idx] = groundspeed_table(
+                    forecasts[idx], segments, altitudes, true_course, ias, metar, dep['elevation']
+                )
+            rows.append(tables[idx])
+            forecast_hours.append(forecasts[idx]['forecastHour'])
+            within_validity.append(valid)
+
+        best = find_best(departure_times, altitudes, rows, within_validity, distance)
+
+        response_data = {
+            'route': {
+                'departure': departure,
+                'destination': destination,
+                'distance': round(distance, 1),
+                'trueCourse': round(true_course, 1),
+                'region': region
+            },
+            'times': [t.strftime('%Y-%m-%dT%H:%MZ') for t in departure_times],
+            'altitudes': altitudes,
+            'groundspeed': [[round(gs, 1) for gs in row] for row in rows],
+            'ete': [[round(distance / gs, 3) for gs in row] for row in rows],
+            'forecastHour': forecast_hours,
+            'withinValidity': within_validity,
+            'best': best
+        }
+
+        logger.info(f"Sweep complete using {len(tables)} forecast periods, best: {best}")
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'GET,OPTIONS',
+                'Content-Type': 'application/json',
+                'Cache-Control': 'max-age=1800'  # Cache for 30 minutes (matches winds aloft)
+            },
+            'body': json.dumps(response_data)
+        }
+
+    except urllib.error.HTTPError as e:
+        logger.error(f"HTTP error during sweep: {e.code} {e.reason}")
+        return error_response(e.code, f'Failed to fetch flight data: HTTP {e.code} {e.reason}')
+
+    except urllib.error.URLError as e:
+        logger.error(f"URL error during sweep: {e.reason}")
+        return error_response(503, f'Failed to connect to aviation service: {str(e.reason)}')
+
+    except Exception as e:
+        logger.error(f"Unexpected error during sweep: {str(e)}", exc_info=True)
+        return error_response(500, f'Internal server error: {str(e)}')
@@ -10,6 +10,11 @@ import urllib.error
 import json
 import logging
 
+try:
+    from . import weather_archive
+except ImportError:
+    import weather_archive
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -63,6 +68,12 @@ def handler(event, context):
         
         logger.info(f"Successfully fetched METAR data for {icao} (status: {status_code}, length: {len(data)})")
         
+        # Feed the history archive; never fail the proxy request over it
+        try:
+            weather_archive.submit('metar', data)
+        except Exception as e:
+            logger.warning(f"Failed to archive METAR for {icao}: {e}")
+        
         # Return with CORS headers
         return {
             'statusCode': 200,
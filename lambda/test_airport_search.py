@@ -0,0 +1,102 @@
+"""
+Tests for incremental refresh of the cached OurAirports data
+"""
+
+import pytest
+
+import airport_search
+
+HEADER = 'id,ident,type,name,latitude_deg,longitude_deg,iso_country,iso_region,icao_code\n'
+
+
+def csv_rows(*rows):
+    return HEADER + ''.join(f'{row}\n' for row in rows)
+
+
+BOS = '1,KBOS,large_airport,Logan,42.36,-71.01,US,US-MA,KBOS'
+ALB = '2,KALB,medium_airport,Albany,42.75,-73.80,US,US-NY,KALB'
+OLD = '3,1B1,small_airport,Old Field,42.10,-73.10,US,US-NY,'
+FOREIGN = '4,CYUL,large_airport,Montreal,45.47,-73.74,CA,CA-QC,CYUL'
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    monkeypatch.setattr(airport_search, '_airport_cache', None)
+    monkeypatch.setattr(airport_search, '_airport_index', {})
+    monkeypatch.setattr(airport_search, '_airport_validators', {})
+
+
+def load(monkeypatch, data):
+    monkeypatch.setattr(airport_search, 'download_airports',
+                        lambda validators=None: (data, {'etag': '"v1"'}))
+    return airport_search.fetch_all_airports()
+
+
+def fresh_parse(data):
+    return sorted(airport_search.parse_airports(data).values(), key=lambda a: a['icao'])
+
+
+def test_diff_applies_add_remove_and_rename(monkeypatch):
+    load(monkeypatch, csv_rows(BOS, ALB, OLD, FOREIGN))
+    bos = airport_search._airport_index['KBOS']
+
+    new_data = csv_rows(
+        BOS.replace('Logan', 'Boston Logan'),
+        OLD,
+        '5,KBED,medium_airport,Hanscom,42.47,-71.29,US,US-MA,KBED'
+    )
+    counts = airport_search.apply_airport_diff(airport_search.parse_airports(new_data))
+
+    assert counts == (1, 1, 1)
+    assert airport_search._airport_cache == fresh_parse(new_data)
+    assert airport_search._airport_index['KBOS'] is not bos
+    assert airport_search._airport_index['1B1'] is next(
+        a for a in airport_search._airport_cache if a['icao'] == '1B1'
+    )
+
+
+def test_diff_moves_airport_when_icao_changes(monkeypatch):
+    load(monkeypatch, csv_rows(BOS, ALB, OLD))
+
+    # An ident gaining an ICAO code moves it to a new position in the list
+    new_data = csv_rows(BOS, ALB, OLD.replace(',US,US-NY,', ',US,US-NY,KZZZ'))
+    counts = airport_search.apply_airport_diff(airport_search.parse_airports(new_data))
+
+    assert counts == (0, 0, 1)
+    assert [a['icao'] for a in airport_search._airport_cache] == ['KALB', 'KBOS', 'KZZZ']
+    assert airport_search._airport_cache == fresh_parse(new_data)
+
+
+def test_diff_keeps_previous_list_intact(monkeypatch):
+    previous = load(monkeypatch, csv_rows(BOS, ALB))
+    snapshot = list(previous)
+
+    airport_search.apply_airport_diff(airport_search.parse_airports(csv_rows(BOS)))
+
+    assert previous == snapshot
+    assert airport_search._airport_cache == fresh_parse(csv_rows(BOS))
+
+
+def test_refresh_event_applies_changes_and_keeps_cache_on_failure(monkeypatch):
+    load(monkeypatch, csv_rows(BOS))
+
+    responses = iter([
+        (None, {'etag': '"v1"'}),
+        (csv_rows(BOS, ALB), {'etag': '"v2"'}),
+    ])
+    seen_validators = []
+
+    def download(validators=None):
+        seen_validators.append(dict(validators))
+        response = next(responses, None)
+        if response is None:
+            raise OSError('upstream down')
+        return response
+
+    monkeypatch.setattr(airport_search, 'download_airports', download)
+
+    for _ in range(3):
+        assert airport_search.handler({'refresh': True}, None) == {'refreshed': True}
+
+    assert seen_validators == [{'etag': '"v1"'}, {'etag': '"v1"'}, {'etag': '"v2"'}]
+    assert airport_search._airport_cache == fresh_parse(csv_rows(BOS, ALB))
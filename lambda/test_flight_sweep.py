@@ -0,0 +1,134 @@
+"""
+Tests for the departure time sweep
+
+Expected groundspeeds were produced by running the same fixture through
+src/lib/flightPlanner.js, so these pin parity with the planner.
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+import flight_sweep
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+RAW_6HR = """DATA BASED ON 011200Z
+VALID 011800Z   FOR USE 1400-2100Z. TEMPS NEG ABV 24000
+
+FT  3000    6000    9000   12000
+BOS 2315 2426+05 2535+01 2643-05
+ALB 3612 0120+04 3530-02 3440-08
+"""
+
+STATION_COORDS = {
+    'BOS': {'lat': 42.36, 'lon': -71.01},
+    'ALB': {'lat': 42.75, 'lon': -73.80}
+}
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def make_forecasts():
+    forecasts = []
+    for valid, use in (('011800', '1400-2100'), ('020000', '2100-0600'), ('021200', '0600-1800')):
+        raw = RAW_6HR.replace('011800Z   FOR USE 1400-2100Z', f'{valid}Z   FOR USE {use}Z')
+        forecasts.append(flight_sweep.parse_winds_aloft(raw, now=NOW))
+    return forecasts
+
+
+def test_groundspeed_table_matches_planner():
+    forecast = flight_sweep.parse_winds_aloft(RAW_6HR, now=NOW)
+    forecast['stationCoords'] = STATION_COORDS
+
+    dep = (42.3656, -71.0096)
+    dest = (42.7483, -73.8017)
+    true_course = flight_sweep.calculate_bearing(*dep, *dest)
+    segments = flight_sweep.segment_route(*dep, *dest, 25)
+
+    table = flight_sweep.groundspeed_table(
+        forecast, segments, [3000, 4000, 7500, 12000], true_course, 120,
+        {'altimeter': 30.12, 'tempC': 12}, 20
+    )
+
+    expected = [119.02729220311117, 119.75603357375604, 121.39972318744215, 116.64382141611223]
+    assert table == pytest.approx(expected, abs=1e-9)
+
+
+def test_validity_window_wraps_midnight():
+    forecasts = make_forecasts()
+
+    assert forecasts[0]['validFrom'] == utc(2024, 1, 1, 14)
+    assert forecasts[0]['validTo'] == utc(2024, 1, 1, 21)
+    assert forecasts[1]['validFrom'] == utc(2024, 1, 1, 21)
+    assert forecasts[1]['validTo'] == utc(2024, 1, 2, 6)
+    assert forecasts[2]['validFrom'] == utc(2024, 1, 2, 6)
+    assert forecasts[2]['validTo'] == utc(2024, 1, 2, 18)
+
+
+@pytest.mark.parametrize('departure_time, expected', [
+    (utc(2024, 1, 1, 15), (0, True)),
+    (utc(2024, 1, 1, 22), (1, True)),
+    (utc(2024, 1, 2, 3), (1, True)),
+    # Same time of day as the 6 hr window, but a day later
+    (utc(2024, 1, 2, 15), (2, True)),
+    # Beyond the 24 hr forecast
+    (utc(2024, 1, 2, 21), (2, False)),
+    # In the past
+    (utc(2023, 12, 31, 16), (0, False)),
+])
+def test_select_forecast_uses_absolute_windows(departure_time, expected):
+    assert flight_sweep.select_forecast(make_forecasts(), departure_time) == expected
+
+
+def sweep(monkeypatch, **params):
+    def fetch_forecasts(region):
+        forecasts = make_forecasts()
+        for forecast, hour in zip(forecasts, (6, 12, 24)):
+            forecast['forecastHour'] = hour
+            forecast['stationCoords'] = STATION_COORDS
+        return forecasts
+
+    monkeypatch.setattr(flight_sweep, 'fetch_forecasts', fetch_forecasts)
+    monkeypatch.setattr(flight_sweep, 'fetch_airports', lambda ids: {
+        'KBOS': {'lat': 42.3656, 'lon': -71.0096, 'elevation': 20},
+        'KALB': {'lat': 42.7483, 'lon': -73.8017, 'elevation': 285}
+    })
+    monkeypatch.setattr(flight_sweep, 'fetch_metar', lambda icao: {'altimeter': 30.12, 'tempC': 12})
+
+    query = {'departure': 'KBOS', 'destination': 'KALB', 'ias': '120',
+             'from': '2024-01-01T00:00Z', 'to': '2024-01-01T23:00Z'}
+    query.update(params)
+    return flight_sweep.handler({'queryStringParameters': query}, None)
+
+
+def test_best_ignores_times_outside_validity(monkeypatch):
+    response = sweep(monkeypatch)
+    body = json.loads(response['body'])
+
+    assert response['statusCode'] == 200
+    assert body['withinValidity'][0] is False
+    assert body['best']['time'] == '2024-01-01T14:00Z'
+    assert body['best']['withinValidity'] is True
+
+
+def test_best_falls_back_when_no_time_is_valid(monkeypatch):
+    body = json.loads(sweep(monkeypatch, to='2024-01-01T06:00Z')['body'])
+
+    assert not any(body['withinValidity'])
+    assert body['best']['time'] == '2024-01-01T00:00Z'
+    assert body['best']['withinValidity'] is False
+
+
+@pytest.mark.parametrize('params', [
+    {'maxAlt': '200000'},
+    {'minAlt': '-1000'},
+    {'ias': 'nan'},
+    {'ias': 'inf'},
+    {'resolution': 'nan'},
+])
+def test_rejects_out_of_range_parameters(monkeypatch, params):
+    assert sweep(monkeypatch, **params)['statusCode'] == 400
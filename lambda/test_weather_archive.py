@@ -0,0 +1,166 @@
+"""
+Tests for the METAR and winds aloft archive
+"""
+
+import json
+import multiprocessing
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+import weather_archive
+
+NOW = datetime(2024, 1, 2, 16, 0, tzinfo=timezone.utc)
+
+WINDS_RAW = """(Extracted from FBUS31 KWNO 021358)
+FD1US1
+DATA BASED ON 021200Z
+VALID 021800Z   FOR USE 1400-2100Z. TEMPS NEG ABV 24000
+
+FT  3000    6000    9000
+BOS 2315 2426+05 2535+01
+ALB 3612 0120+04 3530-02
+"""
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(weather_archive, 'ARCHIVE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def day_file(archive_dir, kind, station, day):
+    return archive_dir / kind / station / f'{day}.dat'
+
+
+def test_metar_round_trip_across_days(archive_dir):
+    weather_archive.archive_metar('KBOS 012354Z 27010KT 10SM A3012\n', NOW)
+    weather_archive.archive_metar('KBOS 020054Z 27012KT 10SM A3011\n', NOW)
+
+    records = weather_archive.query_range('metar', 'KBOS', utc(2024, 1, 1, 23), utc(2024, 1, 2, 1))
+
+    assert records == [
+        (int(utc(2024, 1, 1, 23, 54).timestamp()), 0, 'KBOS 012354Z 27010KT 10SM A3012'),
+        (int(utc(2024, 1, 2, 0, 54).timestamp()), 0, 'KBOS 020054Z 27012KT 10SM A3011'),
+    ]
+    assert os.path.getsize(day_file(archive_dir, 'metar', 'KBOS', '20240101')) == weather_archive.RECORD.size
+
+
+def test_metar_prefix_and_out_of_order_repeats_dedup(archive_dir):
+    assert weather_archive.archive_metar('METAR KBOS 021454Z 27010KT A3012\n', NOW) == 1
+    assert weather_archive.archive_metar('KBOS 021354Z 27010KT A3010\n', NOW) == 1
+    assert weather_archive.archive_metar('KBOS 021454Z 27010KT A3012\n', NOW) == 0
+    assert weather_archive.archive_metar('SPECI KBOS 021354Z 27010KT A3010\n', NOW) == 0
+
+    path = day_file(archive_dir, 'metar', 'KBOS', '20240102')
+    assert os.path.getsize(path) == 2 * weather_archive.RECORD.size
+
+
+def test_long_reports_are_truncated(caplog):
+    weather_archive.archive_metar('KBOS 021454Z ' + 'X' * 300 + '\n', NOW)
+
+    (_, _, text), = weather_archive.query_range('metar', 'KBOS', utc(2024, 1, 2), NOW)
+    assert len(text) == weather_archive.TEXT_SIZE
+    assert 'Truncating' in caplog.text
+
+
+def test_winds_aloft_round_trip():
+    assert weather_archive.archive_winds_aloft(WINDS_RAW, '6', NOW) == 2
+
+    records = weather_archive.query_range('winds', 'BOS', utc(2024, 1, 2), utc(2024, 1, 3))
+
+    assert records == [
+        (int(utc(2024, 1, 2, 18).timestamp()), 6, 'FT 3000 6000 9000\nBOS 2315 2426+05 2535+01')
+    ]
+
+
+def write_raw(path, records):
+    os.makedirs(path.parent, exist_ok=True)
+    with open(path, 'ab') as f:
+        for timestamp, text in records:
+            f.write(weather_archive.RECORD.pack(timestamp, 0, text.encode('utf-8')))
+
+
+def test_compact_sorts_and_dedups_past_days_but_skips_today(archive_dir):
+    late = int(utc(2024, 1, 1, 23).timestamp())
+    early = int(utc(2024, 1, 1, 1).timestamp())
+    yesterday = day_file(archive_dir, 'metar', 'KBOS', '20240101')
+    today = day_file(archive_dir, 'metar', 'KBOS', '20240102')
+    write_raw(yesterday, [(late, 'B'), (early, 'A'), (late, 'B')])
+    write_raw(today, [(late + 7200, 'C'), (late + 7200, 'C')])
+
+    assert weather_archive.compact(NOW) == {'removed': 0, 'compacted': 1}
+
+    assert list(weather_archive._read_records(yesterday)) == [(early, 0, 'A'), (late, 0, 'B')]
+    assert os.path.getsize(today) == 2 * weather_archive.RECORD.size
+
+
+def test_retention_deletes_old_days(archive_dir, monkeypatch):
+    monkeypatch.setattr(weather_archive, 'RETENTION_DAYS', 30)
+    old = day_file(archive_dir, 'metar', 'KOLD', '20231201')
+    kept = day_file(archive_dir, 'metar', 'KBOS', '20231215')
+    write_raw(old, [(int(utc(2023, 12, 1).timestamp()), 'A')])
+    write_raw(kept, [(int(utc(2023, 12, 15).timestamp()), 'A')])
+
+    assert weather_archive.compact(NOW)['removed'] == 1
+
+    assert not old.exists()
+    assert not old.parent.exists()
+    assert kept.exists()
+
+
+def _append_concurrently(writer):
+    for i in range(40):
+        timestamp = f'01{i // 4:02d}{(i % 4) * 15:02d}Z'
+        weather_archive.archive_metar(f'KBOS {timestamp} SHARED\n', NOW)
+        weather_archive.archive_metar(f'KBOS {timestamp} W{writer}\n', NOW)
+
+
+def _compact_concurrently():
+    for _ in range(100):
+        weather_archive.compact(NOW)
+
+
+def test_concurrent_writers_and_compaction_keep_every_record_once(archive_dir):
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_append_concurrently, args=(n,)) for n in range(4)]
+    processes.append(context.Process(target=_compact_concurrently))
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    records = list(weather_archive._read_records(day_file(archive_dir, 'metar', 'KBOS', '20240101')))
+    assert len(records) == len(set(records)) == 40 + 4 * 40
+
+
+def test_handler_returns_records():
+    weather_archive.archive_metar('KBOS 021454Z 27010KT A3012\n', NOW)
+
+    response = weather_archive.handler({'queryStringParameters': {
+        'station': 'kbos', 'from': '2024-01-02T00:00Z', 'to': '2024-01-02T23:00Z'
+    }}, None)
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == [
+        {'time': '2024-01-02T14:54Z', 'forecastHour': 0, 'raw': 'KBOS 021454Z 27010KT A3012'}
+    ]
+
+
+@pytest.mark.parametrize('params', [
+    {'from': '2024-01-02T00:00Z'},
+    {'station': 'K/../X', 'from': '2024-01-02T00:00Z'},
+    {'station': 'KBOS', 'kind': 'taf', 'from': '2024-01-02T00:00Z'},
+    {'station': 'KBOS', 'from': 'yesterday'},
+    {'station': 'KBOS', 'from': '2024-01-02T00:00Z', 'to': '2024-01-01T00:00Z'},
+    {'station': 'KBOS', 'from': '2023-01-01T00:00Z', 'to': '2024-01-01T00:00Z'},
+])
+def test_handler_rejects_invalid_queries(params):
+    response = weather_archive.handler({'queryStringParameters': params}, None)
+
+    assert response['statusCode'] == 400
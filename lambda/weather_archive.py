@@ -0,0 +1,418 @@
+"""
+Append-only archive of METAR and winds aloft observations
+
+The METAR and winds aloft proxies feed this archive as a side effect, so
+history can be served without going back to aviationweather.gov.
+
+Layout: {WEATHER_ARCHIVE_DIR}/{kind}/{station}/{YYYYMMDD}.dat
+
+Each day file is a sequence of fixed-width records:
+    uint32  observation/valid time (epoch seconds, UTC)
+    uint8   forecast hour (0 for METARs)
+    251s    report text, NUL padded
+
+Writers and compaction hold an exclusive lockf lock on a day file (EFS
+supports NFSv4 locks) while they dedup-and-append or rewrite it.
+
+Range queries only open the day files covering the requested window and
+read them through mmap. Compaction sorts and de-duplicates day files and
+deletes days older than the retention period to keep disk usage bounded.
+
+The archive lives on an EFS mount shared by the writer, history and
+compaction functions. The METAR and winds aloft proxies run outside the VPC
+so they keep internet access; they hand responses to the writer function
+with an asynchronous invoke (WEATHER_ARCHIVE_FUNCTION). Without that
+variable, e.g. when running locally, records are written directly to
+WEATHER_ARCHIVE_DIR.
+"""
+
+import fcntl
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+from datetime import datetime, timedelta, timezone
+
+try:
+    from .aviation_time import parse_time, resolve_day_time
+except ImportError:
+    from aviation_time import parse_time, resolve_day_time
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+ARCHIVE_DIR = os.environ.get('WEATHER_ARCHIVE_DIR', '/tmp/weather-archive')
+ARCHIVE_FUNCTION = os.environ.get('WEATHER_ARCHIVE_FUNCTION')
+RETENTION_DAYS = int(os.environ.get('WEATHER_ARCHIVE_RETENTION_DAYS', '30'))
+
+RECORD = struct.Struct('<IB251s')
+TEXT_SIZE = 251
+KINDS = ('metar', 'winds')
+
+# Longest range a single history request may cover
+MAX_QUERY_DAYS = 31
+
+# Lambda client for handing responses to the writer function, created once
+# per container so proxy requests don't pay for client setup
+if ARCHIVE_FUNCTION:
+    import boto3
+    _lambda_client = boto3.client('lambda')
+else:
+    _lambda_client = None
+
+
+def _day_path(kind, station, timestamp):
+    day = datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y%m%d')
+    return os.path.join(ARCHIVE_DIR, kind, station, f'{day}.dat')
+
+
+def _lock_day_file(path):
+    """
+    Open a day file for appending and take an exclusive lock on it.
+
+    Compaction swaps in a rewritten file, so after the lock is granted make
+    sure the path still names the locked file; otherwise retry on the new one.
+    """
+    while True:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            f = open(path, 'a+b')
+        except FileNotFoundError:
+            # Compaction removed an empty station directory; recreate it
+            continue
+
+        fcntl.lockf(f, fcntl.LOCK_EX)
+        try:
+            if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                return f
+        except FileNotFoundError:
+            pass
+        f.close()
+
+
+def append_record(kind, station, timestamp, text, forecast_hour=0):
+    """
+    Append a record to the station's day file.
+    Skips the write when the file already holds the same time and text.
+    """
+    encoded = text.encode('utf-8')
+    if len(encoded) > TEXT_SIZE:
+        logger.warning(f"Truncating {kind} report for {station} from {len(encoded)} to {TEXT_SIZE} bytes")
+        encoded = encoded[:TEXT_SIZE]
+
+    timestamp = int(timestamp)
+    path = _day_path(kind, station, timestamp)
+
+    stored = encoded.decode('utf-8', 'replace')
+
+    # Read through the locked descriptor: closing any other descriptor for
+    # the file would release this process's lock
+    with _lock_day_file(path) as f:
+        # Day files hold at most a few dozen records, so scanning one is cheap
+        for existing_timestamp, _, existing_text in _read_locked_records(f):
+            if existing_timestamp == timestamp and existing_text == stored:
+                return False
+
+        f.write(RECORD.pack(timestamp, forecast_hour, encoded))
+
+    return True
+
+
+def archive_metar(raw_data, now=None):
+    """Archive a raw METAR response, keyed on its observation time"""
+    now = now or datetime.now(timezone.utc)
+    archived = 0
+
+    for line in raw_data.split('\n'):
+        line = line.strip()
+        match = re.match(r'(?:METAR\s+|SPECI\s+)?([A-Z0-9]{3,4})\s+(\d{2})(\d{2})(\d{2})Z', line)
+        if not match:
+            continue
+
+        station = match.group(1)
+        observed = resolve_day_time(
+            int(match.group(2)), int(match.group(3)), int(match.group(4)), now
+        )
+        # Store reports without the METAR/SPECI prefix so both forms de-duplicate
+        report = line[match.start(1):]
+        if append_record('metar', station, observed.timestamp(), report):
+            archived += 1
+
+    return archived
+
+
+def archive_winds_aloft(raw_data, fcst, now=None):
+    """
+    Archive a raw winds aloft response, one record per station keyed on the
+    forecast valid time. Each record keeps the FT altitude header so it can
+    be decoded on its own.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    valid_match = re.search(r'VALID\s+(\d{2})(\d{2})(\d{2})Z', raw_data)
+    header_match = re.search(r'^\s*(FT\s.*)$', raw_data, re.MULTILINE)
+    if not valid_match or not header_match:
+        return 0
+
+    valid = resolve_day_time(
+        int(valid_match.group(1)), int(valid_match.group(2)), int(valid_match.group(3)), now
+    )
+    header = ' '.join(header_match.group(1).split())
+    archived = 0
+
+    for line in raw_data.split('\n'):
+        line = line.strip()
+        # Skip header lines and empty lines
+        if not line or line.startswith('(') or line.startswith('FD') or \
+           line.startswith('DATA') or line.startswith('VALID') or \
+           line.startswith('FT') or 'TEMPS NEG' in line:
+            continue
+
+        parts = line.split()
+        if parts and len(parts[0]) == 3 and parts[0].isalpha():
+            text = f'{header}\n{" ".join(parts)}'
+            if append_record('winds', parts[0], valid.timestamp(), text, int(fcst)):
+                archived += 1
+
+    return archived
+
+
+def submit(kind, raw_data, fcst=0):
+    """
+    Hand a proxied response to the archive.
+    Invokes the writer function asynchronously when WEATHER_ARCHIVE_FUNCTION
+    is set, otherwise archives into the local WEATHER_ARCHIVE_DIR.
+    """
+    if not ARCHIVE_FUNCTION:
+        return archive_handler({'kind': kind, 'raw': raw_data, 'fcst': fcst}, None)
+
+    _lambda_client.invoke(
+        FunctionName=ARCHIVE_FUNCTION,
+        InvocationType='Event',
+        Payload=json.dumps({'kind': kind, 'raw': raw_data, 'fcst': fcst}).encode('utf-8')
+    )
+
+
+def _unpack_records(buffer, size):
+    """Yield (timestamp, forecast_hour, text) for each whole record in a buffer"""
+    for offset in range(0, size - size % RECORD.size, RECORD.size):
+        timestamp, forecast_hour, text = RECORD.unpack_from(buffer, offset)
+        yield timestamp, forecast_hour, text.rstrip(b'\x00').decode('utf-8', 'replace')
+
+
+def _read_locked_records(f):
+    """
+    Records from a day file held under _lock_day_file.
+    Uses a plain read rather than mmap: mmap duplicates the descriptor, and
+    closing that duplicate would release the lock early.
+    """
+    f.seek(0)
+    data = f.read()
+    return list(_unpack_records(data, len(data)))
+
+
+def _read_records(path):
+    """Yield (timestamp, forecast_hour, text) from a day file via mmap"""
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < RECORD.size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from _unpack_records(mm, size)
+    except FileNotFoundError:
+        return
+
+
+def query_range(kind, station, start, end):
+    """Records for a station with start <= time <= end, sorted by time"""
+    start_ts = start.timestamp()
+    end_ts = end.timestamp()
+    results = []
+
+    day = start.date()
+    while day <= end.date():
+        path = os.path.join(ARCHIVE_DIR, kind, station, f'{day:%Y%m%d}.dat')
+        for timestamp, forecast_hour, text in _read_records(path):
+            if start_ts <= timestamp <= end_ts:
+                results.append((timestamp, forecast_hour, text))
+        day += timedelta(days=1)
+
+    # Day files awaiting compaction may still hold duplicates
+    return sorted(set(results))
+
+
+def compact(now=None):
+    """
+    Sort and de-duplicate day files and delete those past retention.
+    Today's files are left alone since the proxies are still appending.
+    """
+    now = now or datetime.now(timezone.utc)
+    today = f'{now:%Y%m%d}'
+    cutoff = f'{now - timedelta(days=RETENTION_DAYS):%Y%m%d}'
+    removed = 0
+    compacted = 0
+
+    for kind in KINDS:
+        kind_dir = os.path.join(ARCHIVE_DIR, kind)
+        if not os.path.isdir(kind_dir):
+            continue
+
+        for station in os.listdir(kind_dir):
+            station_dir = os.path.join(kind_dir, station)
+            for name in os.listdir(station_dir):
+                if not name.endswith('.dat'):
+                    continue
+                day = name[:-len('.dat')]
+                path = os.path.join(station_dir, name)
+
+                if day >= today:
+                    continue
+
+                # Hold the lock until the file is removed or replaced so no
+                # append lands in between; waiting writers then see a new file
+                with _lock_day_file(path) as f:
+                    if day < cutoff:
+                        os.remove(path)
+                        removed += 1
+                        continue
+
+                    original = _read_locked_records(f)
+                    records = sorted(set(original))
+                    if records == original:
+                        continue
+
+                    tmp_path = path + '.tmp'
+                    with open(tmp_path, 'wb') as tmp:
+                        for timestamp, forecast_hour, text in records:
+                            tmp.write(RECORD.pack(timestamp, forecast_hour, text.encode('utf-8')))
+                    os.replace(tmp_path, path)
+                    compacted += 1
+
+            try:
+                os.rmdir(station_dir)
+            except OSError:
+                pass
+
+    return {'removed': removed, 'compacted': compacted}
+
+
+def handler(event, context):
+    """
+    Lambda handler for weather history range queries
+
+    Query Parameters:
+        station (str): ICAO code for METARs (e.g., 'KBOS') or 3-letter
+                       winds aloft station (e.g., 'BOS')
+        kind (str): 'metar' or 'winds' (default 'metar')
+        from (str): Start of range, ISO 8601 UTC (e.g., '2024-01-01T00:00Z')
+        to (str): End of range, ISO 8601 UTC (default now)
+
+    Returns:
+        dict: API Gateway response with archived records in time order
+    """
+
+    # Get query parameters
+    query_params = event.get('queryStringParameters') or {}
+    station = query_params.get('station', '').upper().strip()
+    kind = query_params.get('kind', 'metar')
+
+    if not station or len(station) < 3 or len(station) > 4 or not station.isalnum():
+        logger.warning(f"Invalid station: {station}")
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Content-Type': 'application/json'
+            },
+            'body': json.dumps({
+                'error': 'Invalid station. Must be 3-4 characters (e.g., KBOS, BOS)'
+            })
+        }
+
+    try:
+        if kind not in KINDS:
+            raise ValueError(f'kind must be one of: {", ".join(KINDS)}')
+        end = parse_time(query_params['to']) if query_params.get('to') else datetime.now(timezone.utc)
+        start = parse_time(query_params.get('from', ''))
+        if end < start or end - start > timedelta(days=MAX_QUERY_DAYS):
+            raise ValueError(f'Range must be between 0 and {MAX_QUERY_DAYS} days')
+    except ValueError as e:
+        logger.warning(f"Invalid history query for {station}: {e}")
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Content-Type': 'application/json'
+            },
+            'body': json.dumps({
+                'error': f'Invalid parameters: {str(e)}'
+            })
+        }
+
+    logger.info(f"Querying {kind} history for {station}: {start} to {end}")
+
+    try:
+        records = query_range(kind, station, start, end)
+
+        logger.info(f"Found {len(records)} {kind} records for {station}")
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'GET,OPTIONS',
+                'Content-Type': 'application/json',
+                'Cache-Control': 'max-age=300'  # Cache for 5 minutes
+            },
+            'body': json.dumps([
+                {
+                    'time': datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%MZ'),
+                    'forecastHour': forecast_hour,
+                    'raw': text
+                }
+                for timestamp, forecast_hour, text in records
+            ])
+        }
+
+    except Exception as e:
+        logger.error(f"Error querying {kind} history for {station}: {str(e)}", exc_info=True)
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Content-Type': 'application/json'
+            },
+            'body': json.dumps({
+                'error': f'Failed to query weather history: {str(e)}'
+            })
+        }
+
+
+def archive_handler(event, context):
+    """
+    Lambda handler that writes a proxied response into the archive
+
+    Event:
+        kind (str): 'metar' or 'winds'
+        raw (str): Raw response text from aviationweather.gov
+        fcst (int): Forecast period for winds aloft (6, 12, or 24)
+    """
+    if event.get('kind') == 'winds':
+        archived = archive_winds_aloft(event.get('raw', ''), event.get('fcst', 0))
+    else:
+        archived = archive_metar(event.get('raw', ''))
+
+    logger.info(f"Archived {archived} {event.get('kind')} records")
+    return archived
+
+
+def compact_handler(event, context):
+    """Scheduled Lambda handler for archive compaction and retention"""
+    result = compact()
+    logger.info(f"Compacted weather archive: {result}")
+    return result
@@ -13,6 +13,11 @@ import json
 import logging
 import re
 
+try:
+    from . import weather_archive
+except ImportError:
+    import weather_archive
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -108,6 +113,21 @@ def fetch_station_coordinates(station_codes):
     return coords
 
 
+def fetch_winds_aloft(region, fcst):
+    """
+    Fetch raw winds aloft forecast text for a region and forecast period.
+    Raises urllib errors so callers can map them to HTTP responses.
+    """
+    # Build URL to aviationweather.gov
+    url = f'https://aviationweather.gov/api/data/windtemp?region={region}&fcst={fcst}&level=low&format=raw'
+    
+    req = urllib.request.Request(url)
+    req.add_header('User-Agent', 'Website-Weather-Proxy/1.0')
+    
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.read().decode('utf-8')
+
+
 def handler(event, context):
     """
     Lambda handler for winds aloft proxy
@@ -157,19 +177,16 @@ def handler(event, context):
             })
         }
     
-    # Build URL to aviationweather.gov
-    url = f'https://aviationweather.gov/api/data/windtemp?region={region}&fcst={fcst}&level=low&format=raw'
-    
     try:
-        # Fetch data from aviationweather.gov
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Website-Weather-Proxy/1.0')
+        data = fetch_winds_aloft(region, fcst)
         
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = response.read().decode('utf-8')
-            status_code = response.getcode()
+        logger.info(f"Successfully fetched winds aloft data (length: {len(data)})")
         
-        logger.info(f"Successfully fetched winds aloft data (status: {status_code}, length: {len(data)})")
+        # Feed the history archive; never fail the proxy request over it
+        try:
+            weather_archive.submit('winds', data, int(fcst))
+        except Exception as e:
+            logger.warning(f"Failed to archive winds aloft: {e}")
         
         # Extract station codes and fetch their coordinates
         station_codes = extract_station_codes(data)